@@ -3,76 +3,112 @@
 Verification script for Docker-based SSL fix
 """
 
+import functools
+import mmap
+import shutil
 import subprocess
 import sys
 import os
 
-def check_docker_available():
-    """Check if Docker is installed and running"""
+@functools.lru_cache(maxsize=None)
+def _exists(path):
+    """Cached os.path.exists; see clear_env_cache"""
+    return os.path.exists(path)
+
+@functools.lru_cache(maxsize=1)
+def _docker_version():
+    """Cached docker probe: (ok, message) from a PATH lookup plus `docker --version`"""
+    # PATH lookup first; only spawn docker when it exists (for the version string)
+    docker_path = shutil.which('docker')
+    if docker_path is None:
+        return False, "❌ Docker not installed"
+    
     try:
-        result = subprocess.run(['docker', '--version'], 
+        result = subprocess.run([docker_path, '--version'], 
                               capture_output=True, text=True, timeout=5)
         if result.returncode == 0:
-            print(f"✅ Docker available: {result.stdout.strip()}")
-            return True
+            return True, f"✅ Docker available: {result.stdout.strip()}"
         else:
-            print("❌ Docker command failed")
-            return False
-    except FileNotFoundError:
-        print("❌ Docker not installed")
-        return False
+            return False, "❌ Docker command failed"
     except subprocess.TimeoutExpired:
-        print("❌ Docker command timed out")
-        return False
+        return False, "❌ Docker command timed out"
+
+# Markers are ASCII, so the Dockerfile is matched as raw bytes, never decoded
+REQUIRED_DOCKERFILE_ELEMENTS = (
+    b'python:3.11-slim',
+    b'requirements.txt',
+    b'ssl.OPENSSL_VERSION',
+)
+
+@functools.lru_cache(maxsize=1)
+def _dockerfile_missing():
+    """Cached Dockerfile scan: required markers it lacks, or None when it does not exist"""
+    if not _exists('Dockerfile'):
+        return None
+    with open('Dockerfile', 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:  # an empty file cannot be mapped
+            return REQUIRED_DOCKERFILE_ELEMENTS
+        # Memory-mapped; find() pages in only what it scans
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return tuple(m for m in REQUIRED_DOCKERFILE_ELEMENTS if mm.find(m) == -1)
+
+def clear_env_cache():
+    """Forget cached environment queries (for callers that change the filesystem)"""
+    _exists.cache_clear()
+    _docker_version.cache_clear()
+    _dockerfile_missing.cache_clear()
+
+def check_docker_available():
+    """Check if Docker is installed and running"""
+    ok, message = _docker_version()
+    print(message)
+    return ok
 
 def verify_dockerfile():
     """Verify Dockerfile exists and is correct"""
-    if not os.path.exists('Dockerfile'):
+    missing = _dockerfile_missing()
+    if missing is None:
         print("❌ Dockerfile not found")
         return False
     
-    with open('Dockerfile', 'r') as f:
-        content = f.read()
-    
-    required_elements = [
-        'python:3.11-slim',
-        'requirements.txt',
-        'ssl.OPENSSL_VERSION'
-    ]
-    
-    for element in required_elements:
-        if element not in content:
-            print(f"❌ Dockerfile missing: {element}")
-            return False
+    if missing:
+        print(f"❌ Dockerfile missing: {missing[0].decode()}")
+        return False
     
     print("✅ Dockerfile structure correct")
     return True
 
 def show_solution_summary():
     """Show the complete solution"""
-    print("\n🐳 DOCKER SOLUTION SUMMARY")
-    print("=" * 40)
-    
-    print("\n📋 Problem:")
-    print("   - macOS Python uses LibreSSL 2.8.3")
-    print("   - CCXT requires OpenSSL 1.1.1+")
-    print("   - All exchanges fail with SSL errors")
-    
-    print("\n🛠️ Solution:")
-    print("   - Docker with python:3.11-slim (OpenSSL 3.x)")
-    print("   - Mount project directory")
-    print("   - Run pipeline unchanged")
-    
-    print("\n📁 Files Created:")
+    # Built as one buffer and written once rather than line by line
+    lines = [
+        "\n🐳 DOCKER SOLUTION SUMMARY",
+        "=" * 40,
+        
+        "\n📋 Problem:",
+        "   - macOS Python uses LibreSSL 2.8.3",
+        "   - CCXT requires OpenSSL 1.1.1+",
+        "   - All exchanges fail with SSL errors",
+        
+        "\n🛠️ Solution:",
+        "   - Docker with python:3.11-slim (OpenSSL 3.x)",
+        "   - Mount project directory",
+        "   - Run pipeline unchanged",
+        
+        "\n📁 Files Created:",
+    ]
     files = ['Dockerfile', 'test_docker_ccxt.py', 'docker_setup.sh']
     for file in files:
-        exists = "✅" if os.path.exists(file) else "❌"
-        print(f"   {exists} {file}")
+        exists = "✅" if _exists(file) else "❌"
+        lines.append(f"   {exists} {file}")
     
-    print("\n🚀 Usage Commands:")
-    print("   1. docker build -t crypto-pipeline .")
-    print("   2. docker run --rm -v $(pwd):/app crypto-pipeline python test_docker_ccxt.py")
-    print("   3. docker run --rm -v $(pwd):/app crypto-pipeline python -c \"import sys; sys.path.insert(0,'/app/research'); from fetch_raw import fetch_symbol_data; print('Test:', len(fetch_symbol_data('BTC/USDT','4h','toobit',5)))\"")
+    lines += [
+        "\n🚀 Usage Commands:",
+        "   1. docker build -t crypto-pipeline .",
+        "   2. docker run --rm -v $(pwd):/app crypto-pipeline python test_docker_ccxt.py",
+        "   3. docker run --rm -v $(pwd):/app crypto-pipeline python -c \"import sys; sys.path.insert(0,'/app/research'); from fetch_raw import fetch_symbol_data; print('Test:', len(fetch_symbol_data('BTC/USDT','4h','toobit',5)))\"",
+    ]
+    sys.stdout.write("\n".join(lines) + "\n")
 
 def main():
     """Main verification"""
@@ -88,15 +124,16 @@ def main():
     # Show solution
     show_solution_summary()
     
-    print(f"\n🎯 STATUS:")
+    lines = [f"\n🎯 STATUS:"]
     if docker_ok and dockerfile_ok:
-        print("✅ Ready to test Docker solution")
-        print("   Run: ./docker_setup.sh")
+        lines.append("✅ Ready to test Docker solution")
+        lines.append("   Run: ./docker_setup.sh")
     elif dockerfile_ok:
-        print("⚠️  Docker solution ready, but Docker not installed")
-        print("   Install Docker Desktop, then run: ./docker_setup.sh")
+        lines.append("⚠️  Docker solution ready, but Docker not installed")
+        lines.append("   Install Docker Desktop, then run: ./docker_setup.sh")
     else:
-        print("❌ Setup incomplete")
+        lines.append("❌ Setup incomplete")
+    sys.stdout.write("\n".join(lines) + "\n")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -11,36 +11,94 @@ Research-only guarantees:
 
 from __future__ import annotations
 
-from typing import List
+import math
+from typing import List, Optional
+import bottleneck as bn
 import numpy as np
 import pandas as pd
+from numba import njit
+
+
+# =========================
+# SHARED INPUTS
+# =========================
+def _log_prices(prices: pd.Series, logp: Optional[np.ndarray]) -> np.ndarray:
+    """
+    Return `logp` (checked against prices) or log(prices).
+    """
+    if logp is None:
+        return np.log(prices.to_numpy(dtype=np.float64))
+    if logp.shape != (len(prices),):
+        raise ValueError("logp must match prices length")
+    return logp
 
 
 # =========================
 # RETURN CALCULATIONS (Task 3.1)
 # =========================
-def calculate_returns(prices: pd.Series, periods: List[int]) -> pd.DataFrame:
+def calculate_returns(
+    prices: pd.Series,
+    periods: List[int],
+    logp: Optional[np.ndarray] = None,
+) -> pd.DataFrame:
     """
     ret_n = log(close_t / close_{t-n})
 
+    A precomputed `logp` (log of prices) skips the internal log pass.
+
     Requirements: 2.6
     """
     if not isinstance(prices, pd.Series):
         raise TypeError("prices must be a pandas Series")
 
-    out = pd.DataFrame(index=prices.index)
+    logp = _log_prices(prices, logp)
+    out = np.empty((len(logp), len(periods)), dtype=np.float64)
 
-    for p in periods:
+    for i, p in enumerate(periods):
         if p <= 0:
             raise ValueError("Return period must be positive")
-        out[f"ret_{p}"] = np.log(prices / prices.shift(p))
+        out[:p, i] = np.nan
+        out[p:, i] = logp[p:] - logp[:-p]
 
-    return out
+    return pd.DataFrame(out, index=prices.index, columns=[f"ret_{p}" for p in periods])
 
 
 # =========================
 # EMA FEATURES (Task 3.2)
 # =========================
+@njit(cache=True)
+def _ema_step(s, wt, x, alpha):
+    """
+    One ewm(adjust=False) update of (ema, weight of ema) with bar x.
+
+    Like pandas (ignore_na=False), a NaN bar holds the EMA and decays its
+    weight, so the next observation is blended in with more weight.
+    """
+    if math.isnan(s):
+        if math.isnan(x):
+            return s, wt
+        return x, 1.0
+    wt *= 1.0 - alpha
+    if not math.isnan(x):
+        if s != x:
+            s = (wt * s + alpha * x) / (wt + alpha)
+        wt = 1.0
+    return s, wt
+
+
+@njit(cache=True)
+def _ema_columns(x, alphas, out):
+    """
+    Fill out[:, j] with the EMA of x for every alphas[j].
+    """
+    for j in range(alphas.shape[0]):
+        s = np.nan
+        wt = 1.0
+        for i in range(x.shape[0]):
+            s, wt = _ema_step(s, wt, x[i], alphas[j])
+            out[i, j] = s
+
+
 def calculate_ema(prices: pd.Series, windows: List[int]) -> pd.DataFrame:
     """
     ema_w = exponential moving average
@@ -50,14 +108,15 @@ def calculate_ema(prices: pd.Series, windows: List[int]) -> pd.DataFrame:
     if not isinstance(prices, pd.Series):
         raise TypeError("prices must be a pandas Series")
 
-    out = pd.DataFrame(index=prices.index)
-
     for w in windows:
         if w <= 0:
             raise ValueError("EMA window must be positive")
-        out[f"ema_{w}"] = prices.ewm(span=w, adjust=False).mean()
 
-    return out
+    x = prices.to_numpy(dtype=np.float64)
+    out = np.empty((len(x), len(windows)), dtype=np.float64)
+    _ema_columns(x, np.array([2.0 / (w + 1) for w in windows], dtype=np.float64), out)
+
+    return pd.DataFrame(out, index=prices.index, columns=[f"ema_{w}" for w in windows])
 
 
 def calculate_price_ema_ratios(
@@ -96,14 +155,30 @@ def calculate_realized_volatility(ret_1: pd.Series, windows: List[int]) -> pd.Da
     if not isinstance(ret_1, pd.Series):
         raise TypeError("ret_1 must be a pandas Series")
 
-    out = pd.DataFrame(index=ret_1.index)
+    sq = ret_1.to_numpy(dtype=np.float64) ** 2
+    n = len(sq)
+    missing = np.isnan(sq)
 
-    for w in windows:
+    # Prefix sums of squared returns and of NaN counts; a window with any
+    # NaN stays NaN, matching rolling(w).sum()
+    csum = np.zeros(n + 1)
+    np.cumsum(np.where(missing, 0.0, sq), out=csum[1:])
+    cnan = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(missing, out=cnan[1:])
+
+    out = np.empty((n, len(windows)), dtype=np.float64)
+
+    for i, w in enumerate(windows):
         if w <= 0:
             raise ValueError("Volatility window must be positive")
-        out[f"rv_{w}"] = np.sqrt((ret_1 ** 2).rolling(w).sum())
+        out[:w - 1, i] = np.nan
+        if w > n:
+            continue
+        rv = np.sqrt(csum[w:] - csum[:-w])
+        rv[(cnan[w:] - cnan[:-w]) > 0] = np.nan
+        out[w - 1:, i] = rv
 
-    return out
+    return pd.DataFrame(out, index=ret_1.index, columns=[f"rv_{w}" for w in windows])
 
 
 # =========================
@@ -118,7 +193,8 @@ def calculate_log_volume(volume: pd.Series) -> pd.Series:
     if not isinstance(volume, pd.Series):
         raise TypeError("volume must be a pandas Series")
 
-    return np.log(volume.clip(lower=1))
+    v = volume.to_numpy(dtype=np.float64)
+    return pd.Series(np.log(np.maximum(v, 1.0)), index=volume.index, name=volume.name)
 
 
 def calculate_adv_30(volume: pd.Series) -> pd.Series:
@@ -130,7 +206,12 @@ def calculate_adv_30(volume: pd.Series) -> pd.Series:
     if not isinstance(volume, pd.Series):
         raise TypeError("volume must be a pandas Series")
 
-    return volume.rolling(30).mean()
+    # bottleneck rejects a window longer than the input; rolling(30) gives all NaN
+    if len(volume) < 30:
+        return pd.Series(np.nan, index=volume.index, name=volume.name)
+
+    adv = bn.move_mean(volume.to_numpy(dtype=np.float64), window=30, min_count=30)
+    return pd.Series(adv, index=volume.index, name=volume.name)
 
 
 # =========================
@@ -145,24 +226,155 @@ def shift_features_for_causality(features: pd.DataFrame) -> pd.DataFrame:
     if not isinstance(features, pd.DataFrame):
         raise TypeError("features must be a DataFrame")
 
-    return features.shift(1)
+    vals = features.to_numpy(dtype=np.float64)
+    out = np.empty_like(vals)
+    out[:1] = np.nan
+    out[1:] = vals[:-1]
+    return pd.DataFrame(out, index=features.index, columns=features.columns, copy=False)
 
 
 # =========================
 # TRAINING LABEL (Task 3.4)
 # =========================
-def create_future_ret_label(prices: pd.Series) -> pd.Series:
+def create_future_ret_label(
+    prices: pd.Series,
+    logp: Optional[np.ndarray] = None,
+) -> pd.Series:
     """
     future_ret = log(close_{t+1} / close_t)
 
+    A precomputed `logp` (log of prices) turns this into a difference.
+
     Requirements: 2.12
     """
     if not isinstance(prices, pd.Series):
         raise TypeError("prices must be a pandas Series")
 
-    y = np.log(prices.shift(-1) / prices)
-    y.name = "future_ret"
-    return y
+    y = np.empty(len(prices), dtype=np.float64)
+    if logp is None:
+        p = prices.to_numpy(dtype=np.float64)
+        y[:-1] = np.log(p[1:] / p[:-1])
+    else:
+        logp = _log_prices(prices, logp)
+        y[:-1] = logp[1:] - logp[:-1]
+    y[-1:] = np.nan
+    return pd.Series(y, index=prices.index, name="future_ret")
+
+
+# =========================
+# SINGLE-PASS KERNEL (Task 3.5)
+# =========================
+@njit(cache=True)
+def _build_all(close, logp, volume, periods, alphas, rv_windows, adv_window, skip, out):
+    """
+    Fill `out` with every feature (already shifted +1 bar) in one sweep.
+
+    Column order: returns, EMAs, EMA ratios, realized vols, log_volume,
+    adv. If `out` has one extra column it receives future_ret (unshifted).
+    The first `skip` rows are not written; `out` holds rows skip..n-1.
+    Returns and the label read `logp` (log of close); vols and adv keep
+    their history in small ring buffers.
+    """
+    n = close.shape[0]
+    n_out = out.shape[0]
+    n_ret = periods.shape[0]
+    n_ema = alphas.shape[0]
+    n_rv = rv_windows.shape[0]
+    c_ema = n_ret
+    c_ratio = c_ema + n_ema
+    c_rv = c_ratio + n_ema
+    c_vol = c_rv + n_rv
+    n_feat = c_vol + 2
+    with_label = out.shape[1] > n_feat
+
+    # Ring sizes keep the bar that leaves each window alongside the new one
+    sq_len = 1
+    for j in range(n_rv):
+        sq_len = max(sq_len, rv_windows[j] + 1)
+    vol_len = adv_window + 1
+
+    sq_ring = np.empty(sq_len)
+    vol_ring = np.empty(vol_len)
+    ema = np.full(n_ema, np.nan)
+    ema_wt = np.ones(n_ema)
+    rv_sum = np.zeros(n_rv)
+    rv_nan = np.zeros(n_rv, dtype=np.int64)
+    vol_sum = 0.0
+    vol_nan = 0
+
+    if skip == 0 and n_out > 0:
+        for j in range(n_feat):
+            out[0, j] = np.nan
+
+    for i in range(n):
+        x = close[i]
+        lx = logp[i]
+
+        # Features of bar i land on row i + 1 (causality shift)
+        row = i + 1 - skip
+        write = 0 <= row < n_out
+
+        # Label: future_ret of bar i - 1
+        if with_label and i - 1 - skip >= 0:
+            out[i - 1 - skip, n_feat] = lx - logp[i - 1]
+
+        for j in range(n_ret):
+            p = periods[j]
+            if write:
+                out[row, j] = lx - logp[i - p] if i >= p else np.nan
+
+        for j in range(n_ema):
+            ema[j], ema_wt[j] = _ema_step(ema[j], ema_wt[j], x, alphas[j])
+            if write:
+                out[row, c_ema + j] = ema[j]
+                out[row, c_ratio + j] = x / ema[j] - 1.0
+
+        if i >= 1:
+            r = lx - logp[i - 1]
+            sq = r * r
+        else:
+            sq = np.nan
+        sq_ring[i % sq_len] = sq
+        for j in range(n_rv):
+            w = rv_windows[j]
+            if math.isnan(sq):
+                rv_nan[j] += 1
+            else:
+                rv_sum[j] += sq
+            if i >= w:
+                old = sq_ring[(i - w) % sq_len]
+                if math.isnan(old):
+                    rv_nan[j] -= 1
+                else:
+                    rv_sum[j] -= old
+            if write:
+                if i >= w - 1 and rv_nan[j] == 0:
+                    # Running add/subtract can drift just below zero
+                    out[row, c_rv + j] = math.sqrt(max(rv_sum[j], 0.0))
+                else:
+                    out[row, c_rv + j] = np.nan
+
+        v = volume[i]
+        vol_ring[i % vol_len] = v
+        if math.isnan(v):
+            vol_nan += 1
+        else:
+            vol_sum += v
+        if i >= adv_window:
+            old = vol_ring[(i - adv_window) % vol_len]
+            if math.isnan(old):
+                vol_nan -= 1
+            else:
+                vol_sum -= old
+        if write:
+            out[row, c_vol] = math.log(max(v, 1.0)) if not math.isnan(v) else np.nan
+            if i >= adv_window - 1 and vol_nan == 0:
+                out[row, c_vol + 1] = vol_sum / adv_window
+            else:
+                out[row, c_vol + 1] = np.nan
+
+    if with_label and n_out > 0:
+        out[n_out - 1, n_feat] = np.nan
 
 
 # =========================
@@ -171,10 +383,14 @@ def create_future_ret_label(prices: pd.Series) -> pd.Series:
 def build_feature_set(
     ohlcv: pd.DataFrame,
     include_labels: bool = True,
+    drop_warmup: bool = True,
 ) -> pd.DataFrame:
     """
     Build full causal feature set from OHLCV data.
 
+    With `drop_warmup`, leading rows whose lookback windows are still
+    incomplete (NaN features) are never materialized.
+
     Requirements: 2.2 – 2.5
     """
     required = {"open", "high", "low", "close", "volume"}
@@ -184,31 +400,45 @@ def build_feature_set(
     close = ohlcv["close"]
     volume = ohlcv["volume"]
 
-    # Core features
-    ret_df = calculate_returns(close, [1, 3, 6, 12])
-    ema_df = calculate_ema(close, [12, 24, 48])
-    ratio_df = calculate_price_ema_ratios(close, ema_df, [12, 24, 48])
-    vol_df = calculate_realized_volatility(ret_df["ret_1"], [24, 72])
-
-    # Volume features
-    log_vol = calculate_log_volume(volume).to_frame("log_volume")
-    adv_30 = calculate_adv_30(volume).to_frame("adv_30")
+    periods = [1, 3, 6, 12]
+    windows = [12, 24, 48]
+    rv_windows = [24, 72]
 
-    # Combine
-    features = pd.concat(
-        [ret_df, ema_df, ratio_df, vol_df, log_vol, adv_30],
-        axis=1,
+    columns = (
+        [f"ret_{p}" for p in periods]
+        + [f"ema_{w}" for w in windows]
+        + [f"close_ema_{w}_ratio" for w in windows]
+        + [f"rv_{w}" for w in rv_windows]
+        + ["log_volume", "adv_30"]
     )
 
-    # Enforce causality
-    features = shift_features_for_causality(features)
-
     # Labels (training only)
     if include_labels:
-        y = create_future_ret_label(close)
-        features = pd.concat([features, y], axis=1)
-
-    return features
+        columns.append("future_ret")
+
+    # Longest lookback (+1 bar causality shift) before all features exist
+    warmup = max(periods + rv_windows + [30]) + 1 if drop_warmup else 0
+    warmup = min(warmup, len(ohlcv))
+
+    # One sweep over the bars fills every feature, applies the +1 bar
+    # causality shift and writes the label; log(close) is shared by the
+    # returns, volatilities and label
+    matrix = np.empty((len(ohlcv) - warmup, len(columns)), dtype=np.float64)
+    if len(matrix) > 0:
+        x = close.to_numpy(dtype=np.float64)
+        _build_all(
+            x,
+            np.log(x),
+            volume.to_numpy(dtype=np.float64),
+            np.array(periods, dtype=np.int64),
+            np.array([2.0 / (w + 1) for w in windows], dtype=np.float64),
+            np.array(rv_windows, dtype=np.int64),
+            30,
+            warmup,
+            matrix,
+        )
+
+    return pd.DataFrame(matrix, index=ohlcv.index[warmup:], columns=columns, copy=False)
 
 
 # =========================
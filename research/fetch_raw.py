@@ -5,17 +5,23 @@ Research-only guarantees:
 - Deterministic
 - Sequential (no async)
 - Closed candles only
-- No incremental updates
+- Incremental updates only append bars newer than the parquet cache
 - Import-safe
 """
 
 from __future__ import annotations
 
+import hashlib
 import os
-from typing import Optional
+import time
+from typing import Dict, Optional, Tuple
 
 import ccxt
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
 
 
 # =========================
@@ -25,25 +31,26 @@ DEFAULT_TIMEFRAME = "4h"
 DEFAULT_EXCHANGE = "toobit"
 DEFAULT_LIMIT = 1000
 CACHE_DIR = "research/raw"
+FETCH_CACHE_DIR = ".cache/ohlcv"
+ROW_GROUP_ROWS = 65536  # appends fill the last row group up to this size
 
 
 # =========================
-# EXCHANGE SINGLETON
+# EXCHANGE REGISTRY
 # =========================
-_EXCHANGE: Optional[ccxt.Exchange] = None
+_EXCHANGES: Dict[str, ccxt.Exchange] = {}
 
 
 def _get_exchange(exchange_name: str) -> ccxt.Exchange:
     """
-    Initialize and reuse a single CCXT exchange instance.
+    Initialize and reuse one CCXT exchange instance per exchange name.
     """
-    global _EXCHANGE
-    if _EXCHANGE is None:
+    if exchange_name not in _EXCHANGES:
         exchange_class = getattr(ccxt, exchange_name)
-        _EXCHANGE = exchange_class({
+        _EXCHANGES[exchange_name] = exchange_class({
             "enableRateLimit": True,
         })
-    return _EXCHANGE
+    return _EXCHANGES[exchange_name]
 
 
 # =========================
@@ -55,10 +62,14 @@ def fetch_symbol_data(
     exchange_name: str = DEFAULT_EXCHANGE,
     limit: int = DEFAULT_LIMIT,
     since: Optional[pd.Timestamp] = None,
+    exchange: Optional[ccxt.Exchange] = None,
 ) -> pd.DataFrame:
     """
     Fetch OHLCV data using CCXT.
 
+    A caller-owned `exchange` instance (e.g. with markets already loaded)
+    is used as-is; otherwise one is reused per `exchange_name`.
+
     Invariants:
     - timestamps are UTC
     - data sorted by time
@@ -67,7 +78,7 @@ def fetch_symbol_data(
 
     Requirements: 1.1, 1.2, 1.4
     """
-    ex = _get_exchange(exchange_name)
+    ex = exchange if exchange is not None else _get_exchange(exchange_name)
 
     fetch_kwargs = {
         "symbol": symbol,
@@ -90,16 +101,23 @@ def fetch_symbol_data(
     if not ohlcv:
         return pd.DataFrame()
 
-    df = pd.DataFrame(
-        ohlcv,
-        columns=["timestamp", "open", "high", "low", "close", "volume"],
-    )
+    # One typed array, then column views; avoids the row-wise list constructor
+    arr = np.asarray(ohlcv, dtype=np.float64)
+    ts = arr[:, 0].astype(np.int64)
 
-    # UTC, timezone-aware
-    df["timestamp"] = pd.to_datetime(df["timestamp"], unit="ms", utc=True)
+    df = pd.DataFrame({
+        # UTC, timezone-aware
+        "timestamp": pd.to_datetime(ts, unit="ms", utc=True),
+        "open": arr[:, 1],
+        "high": arr[:, 2],
+        "low": arr[:, 3],
+        "close": arr[:, 4],
+        "volume": arr[:, 5],
+    })
 
-    # Enforce ordering
-    df = df.sort_values("timestamp").reset_index(drop=True)
+    # Enforce ordering (CCXT normally returns bars already ascending)
+    if not np.all(np.diff(ts) >= 0):
+        df = df.sort_values("timestamp").reset_index(drop=True)
 
     # 🚨 CRITICAL RULE:
     # CCXT does NOT guarantee the last candle is closed.
@@ -128,7 +146,17 @@ def cache_to_parquet(
     fname = symbol.replace("/", "_") + ".parquet"
     path = os.path.join(cache_dir, fname)
 
-    data.to_parquet(path, index=False, engine="pyarrow")
+    # ZSTD in a single row group; dictionary pages only add overhead for
+    # unique timestamps and continuous prices
+    data.to_parquet(
+        path,
+        index=False,
+        engine="pyarrow",
+        compression="zstd",
+        compression_level=3,
+        use_dictionary=False,
+        row_group_size=max(len(data), 1),
+    )
 
 
 def load_cached_data(
@@ -145,12 +173,209 @@ def load_cached_data(
         return pd.DataFrame()
 
     try:
-        df = pd.read_parquet(path, engine="pyarrow")
-        return df.sort_values("timestamp").reset_index(drop=True)
+        # Memory-mapped read; NumPy-backed columns keep downstream feature
+        # kernels on plain float64 arrays. Caches are written sorted, so the
+        # re-sort is only paid for foreign files.
+        df = pd.read_parquet(path, engine="pyarrow", memory_map=True)
+        if not df["timestamp"].is_monotonic_increasing:
+            df = df.sort_values("timestamp")
+        return df.reset_index(drop=True)
     except Exception:
         return pd.DataFrame()
 
 
+def append_to_parquet(
+    data: pd.DataFrame,
+    symbol: str,
+    cache_dir: str = CACHE_DIR,
+) -> int:
+    """
+    Append OHLCV rows to a symbol's parquet cache.
+
+    Only the cached timestamp column is read to drop rows already present
+    (cached bars win; closed candles are immutable). Parquet files cannot
+    be appended in place, so the file is still rewritten on every call:
+    existing row groups are streamed through one at a time, which bounds
+    peak memory by a row group, not the I/O, which grows with the full
+    history. New rows are merged into the last row group until it holds
+    ROW_GROUP_ROWS rows, so repeated small appends do not pile up tiny row
+    groups. Rows older than the cached tail fall back to a sorted rewrite.
+    Returns the number of rows added.
+    """
+    if data.empty:
+        return 0
+
+    fname = symbol.replace("/", "_") + ".parquet"
+    path = os.path.join(cache_dir, fname)
+
+    if not os.path.exists(path):
+        cache_to_parquet(data, symbol, cache_dir)
+        return len(data)
+
+    with pq.ParquetFile(path, memory_map=True) as pf:
+        schema = pf.schema_arrow
+        new_table = pa.Table.from_pandas(data, preserve_index=False).cast(schema)
+
+        cached_ts = pf.read(columns=["timestamp"]).column(0).cast(pa.int64()).to_numpy()
+        new_ts = new_table.column("timestamp").cast(pa.int64()).to_numpy()
+        keep = ~np.isin(new_ts, cached_ts)
+        if not keep.any():
+            return 0
+        new_table = new_table.filter(pa.array(keep))
+
+        if len(cached_ts) and new_ts[keep].min() <= cached_ts.max():
+            merged = pa.concat_tables([pf.read(), new_table]).sort_by("timestamp")
+            cache_to_parquet(merged.to_pandas(), symbol, cache_dir)
+            return int(keep.sum())
+
+        tmp_path = path + ".tmp"
+        with pq.ParquetWriter(
+            tmp_path,
+            schema,
+            compression="zstd",
+            compression_level=3,
+            use_dictionary=False,
+        ) as writer:
+            last = pf.num_row_groups - 1
+            for i in range(last):
+                writer.write_table(pf.read_row_group(i))
+            tail = pf.read_row_group(last) if last >= 0 else new_table.slice(0, 0)
+            if tail.num_rows < ROW_GROUP_ROWS:
+                tail, new_table = pa.concat_tables([tail, new_table]), None
+            if tail.num_rows:
+                writer.write_table(tail, row_group_size=tail.num_rows)
+            if new_table is not None:
+                writer.write_table(new_table, row_group_size=new_table.num_rows)
+
+    os.replace(tmp_path, path)
+    return int(keep.sum())
+
+
+def load_all_cached(cache_dir: str = CACHE_DIR) -> pd.DataFrame:
+    """
+    Load every cached symbol into one frame with a `symbol` column.
+
+    The `*.parquet` files in the cache directory (other files, such as an
+    interrupted append's `.tmp`, are ignored) are opened as one pyarrow
+    dataset and read in a single scan. Unreadable files raise.
+    """
+    if not os.path.isdir(cache_dir):
+        return pd.DataFrame()
+
+    fnames = sorted(f for f in os.listdir(cache_dir) if f.endswith(".parquet"))
+    if not fnames:
+        return pd.DataFrame()
+
+    dataset = ds.dataset([os.path.join(cache_dir, f) for f in fnames], format="parquet")
+    # Row counts come from the file footers; the scan keeps file order
+    counts = [fragment.count_rows() for fragment in dataset.get_fragments()]
+    df = dataset.to_table().to_pandas()
+
+    symbols = [f[: -len(".parquet")].replace("_", "/") for f in fnames]
+    codes = np.repeat(np.arange(len(symbols)), counts)
+    df.insert(0, "symbol", pd.Categorical.from_codes(codes, categories=symbols))
+    return df.sort_values(["symbol", "timestamp"]).reset_index(drop=True)
+
+
+# =========================
+# INCREMENTAL FETCH
+# =========================
+def fetch_symbol_data_incremental(
+    symbol: str,
+    timeframe: str = DEFAULT_TIMEFRAME,
+    exchange_name: str = DEFAULT_EXCHANGE,
+    limit: int = DEFAULT_LIMIT,
+    cache_dir: str = CACHE_DIR,
+    exchange: Optional[ccxt.Exchange] = None,
+) -> pd.DataFrame:
+    """
+    Fetch only bars after the cached history and append them to the cache.
+
+    Only the cached timestamp column is read to find where to resume; new
+    bars are added with append_to_parquet. Without a cache this is a plain
+    fetch. `exchange` is passed through to fetch_symbol_data. Returns the
+    full cached history after the update (unchanged on a failed fetch).
+
+    Cached bars are never rewritten, so only bars whose close time has
+    passed are appended. fetch_symbol_data keeps a lone bar, which right
+    after a close is usually the new, still-open candle.
+    """
+    fname = symbol.replace("/", "_") + ".parquet"
+    path = os.path.join(cache_dir, fname)
+    bar = pd.Timedelta(seconds=ccxt.Exchange.parse_timeframe(timeframe))
+
+    since = None
+    if os.path.exists(path):
+        try:
+            cached_ts = pq.read_table(path, columns=["timestamp"]).column(0)
+        except Exception:
+            cached_ts = None
+        if cached_ts is not None and len(cached_ts):
+            since = cached_ts.to_pandas().max() + bar
+
+    new = fetch_symbol_data(symbol, timeframe, exchange_name, limit, since=since, exchange=exchange)
+    if not new.empty:
+        new = new[new["timestamp"] + bar <= pd.Timestamp.now(tz="UTC")]
+    if not new.empty:
+        append_to_parquet(new, symbol, cache_dir)
+
+    return load_cached_data(symbol, cache_dir)
+
+
+# =========================
+# FETCH CACHE (TTL)
+# =========================
+# In-process layer over the parquet files: path -> (written at, frame)
+_FETCH_MEMO: Dict[str, Tuple[float, pd.DataFrame]] = {}
+
+
+def fetch_symbol_data_cached(
+    symbol: str,
+    timeframe: str = DEFAULT_TIMEFRAME,
+    exchange_name: str = DEFAULT_EXCHANGE,
+    limit: int = DEFAULT_LIMIT,
+    since: Optional[pd.Timestamp] = None,
+    exchange: Optional[ccxt.Exchange] = None,
+    cache_dir: str = FETCH_CACHE_DIR,
+) -> pd.DataFrame:
+    """
+    fetch_symbol_data behind an in-process memo and a parquet disk cache.
+
+    Entries are keyed by (exchange, symbol, timeframe, since, limit) and
+    stay valid for one candle duration, after which a new bar may have
+    closed. The exchange part is `exchange.id` when an instance is passed,
+    else `exchange_name`. Repeat calls in one process skip the parquet
+    read; callers get a copy. Empty results are never cached.
+    """
+    venue = exchange.id if exchange is not None else exchange_name
+    key = hashlib.blake2b(
+        repr((venue, symbol, timeframe, since, limit)).encode(),
+        digest_size=16,
+    ).hexdigest()
+    path = os.path.join(cache_dir, key + ".parquet")
+    ttl = ccxt.Exchange.parse_timeframe(timeframe)
+    now = time.time()
+
+    memo = _FETCH_MEMO.get(path)
+    if memo is not None and now - memo[0] < ttl:
+        return memo[1].copy()
+
+    if os.path.exists(path):
+        written = os.path.getmtime(path)
+        if now - written < ttl:
+            df = pd.read_parquet(path)
+            _FETCH_MEMO[path] = (written, df)
+            return df.copy()
+
+    df = fetch_symbol_data(symbol, timeframe, exchange_name, limit, since, exchange)
+    if not df.empty:
+        os.makedirs(cache_dir, exist_ok=True)
+        df.to_parquet(path, index=False, engine="pyarrow", compression="zstd")
+        _FETCH_MEMO[path] = (now, df.copy())
+
+    return df
+
+
 # =========================
 # IMPORT SAFETY
 # =========================
@@ -0,0 +1,94 @@
+"""
+Per-symbol research pipeline, parallelized across symbols.
+
+Research-only guarantees:
+- Each symbol runs fetch -> features -> training independently
+- One worker process per symbol (up to the CPU count), cores split between them
+- No artifact export (artifacts/ holds a single model)
+- Import-safe
+"""
+
+from __future__ import annotations
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+import ccxt
+from lightgbm import LGBMRegressor
+
+from build_features import build_feature_set
+from fetch_raw import DEFAULT_EXCHANGE, DEFAULT_LIMIT, DEFAULT_TIMEFRAME, fetch_symbol_data
+from train_model import prepare_training_data, train_lightgbm_model
+
+
+# =========================
+# SINGLE SYMBOL
+# =========================
+def run_symbol_pipeline(
+    symbol: str,
+    timeframe: str = DEFAULT_TIMEFRAME,
+    exchange_name: str = DEFAULT_EXCHANGE,
+    limit: int = DEFAULT_LIMIT,
+    n_jobs: int = -1,
+    exchange: Optional[ccxt.Exchange] = None,
+) -> Optional[LGBMRegressor]:
+    """
+    Fetch, build features and train a model for one symbol.
+
+    `n_jobs` is passed to LightGBM and `exchange` to fetch_symbol_data.
+    Returns None when no data or no complete training rows are available.
+    """
+    data = fetch_symbol_data(symbol, timeframe, exchange_name, limit, exchange=exchange)
+    if data.empty:
+        return None
+
+    features = build_feature_set(data, include_labels=True)
+    X, y = prepare_training_data(features)
+    if len(X) == 0:
+        return None
+
+    return train_lightgbm_model(X, y, n_jobs=n_jobs)
+
+
+# =========================
+# ALL SYMBOLS
+# =========================
+def run_pipeline_parallel(
+    symbols: List[str],
+    timeframe: str = DEFAULT_TIMEFRAME,
+    exchange_name: str = DEFAULT_EXCHANGE,
+    limit: int = DEFAULT_LIMIT,
+    max_workers: Optional[int] = None,
+    exchange: Optional[ccxt.Exchange] = None,
+) -> Dict[str, Optional[LGBMRegressor]]:
+    """
+    Run run_symbol_pipeline for every symbol in separate processes.
+
+    The cores are split between workers, so each worker's LightGBM uses
+    about cpu_count // max_workers threads. An `exchange` instance is
+    pickled into every worker. Duplicate symbols run once; results are
+    keyed by symbol in first-seen order.
+    """
+    symbols = list(dict.fromkeys(symbols))
+    if not symbols:
+        return {}
+
+    cpus = os.cpu_count() or 1
+    if max_workers is None:
+        max_workers = min(len(symbols), cpus)
+    n_jobs = max(1, cpus // max_workers)
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = [
+            pool.submit(run_symbol_pipeline, symbol, timeframe, exchange_name, limit, n_jobs, exchange)
+            for symbol in symbols
+        ]
+        return {symbol: f.result() for symbol, f in zip(symbols, futures)}
+
+
+# =========================
+# IMPORT SAFETY
+# =========================
+if __name__ == "__main__":
+    pass
@@ -4,9 +4,34 @@ Phase 3: Live CCXT fetch test in GitHub Actions.
 Minimal isolated test - no scanner, no training, no caching.
 """
 
-import ccxt
+import asyncio
+import ssl
 import sys
 
+import aiohttp
+import certifi
+import ccxt.async_support as ccxt
+
+async def fetch_live_ohlcv(exchange_name, symbol, timeframe, limit):
+    """Fetch OHLCV over one keep-alive aiohttp session; returns the raw rows."""
+    
+    # ccxt only sets up its certifi SSL context on sessions it creates; match it here
+    ssl_context = ssl.create_default_context(cafile=certifi.where())
+    connector = aiohttp.TCPConnector(keepalive_timeout=30, limit=50, ssl=ssl_context)
+    session = aiohttp.ClientSession(connector=connector, trust_env=True)
+    exchange = getattr(ccxt, exchange_name)({"session": session})
+    
+    try:
+        print(f"✅ Exchange initialized: {exchange.name}")
+        
+        # Perform live fetch
+        print("🔄 Fetching live OHLCV data...")
+        return await exchange.fetch_ohlcv(symbol, timeframe, limit=limit)
+    finally:
+        # A caller-supplied session is not owned by the exchange; close both
+        await exchange.close()
+        await session.close()
+
 def test_live_ccxt_fetch():
     """Test single live CCXT fetch with minimal data."""
     
@@ -28,13 +53,7 @@ def test_live_ccxt_fetch():
     print(f"Limit: {limit}")
     
     try:
-        # Initialize exchange
-        exchange = getattr(ccxt, exchange_name)()
-        print(f"✅ Exchange initialized: {exchange.name}")
-        
-        # Perform live fetch
-        print("🔄 Fetching live OHLCV data...")
-        ohlcv = exchange.fetch_ohlcv(symbol, timeframe, limit=limit)
+        ohlcv = asyncio.run(fetch_live_ohlcv(exchange_name, symbol, timeframe, limit))
         
         # Print results
         rows_fetched = len(ohlcv)
@@ -67,4 +86,4 @@ def main():
         sys.exit(1)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
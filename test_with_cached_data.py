@@ -12,6 +12,17 @@ from fetch_raw import load_cached_data
 from build_features import build_feature_set
 from train_model import prepare_training_data, train_lightgbm_model, export_model_artifacts
 
+def rolling_mean_std(x, window):
+    """Sliding-window mean and sample std (ddof=1) from cumulative sums"""
+    x = np.asarray(x, dtype=np.float64)
+    s1 = np.concatenate(([0.0], np.cumsum(x)))
+    s2 = np.concatenate(([0.0], np.cumsum(x * x)))
+    sums = s1[window:] - s1[:-window]
+    sq_sums = s2[window:] - s2[:-window]
+    mean = sums / window
+    var = np.maximum(sq_sums - sums * mean, 0.0) / (window - 1)
+    return mean, np.sqrt(var)
+
 def analyze_cached_data():
     """Load and analyze the cached BTC data"""
     
@@ -23,36 +34,35 @@ def analyze_cached_data():
     
     if data.empty:
         print("❌ No cached data found")
-        return None
+        return None, None
+    
+    close = data['close'].to_numpy()
+    volume = data['volume'].to_numpy()
     
     print(f"✅ Loaded {len(data)} rows of cached BTC/USDT data")
     print(f"   Time range: {data['timestamp'].min()} to {data['timestamp'].max()}")
-    print(f"   Price range: ${data['close'].min():,.2f} - ${data['close'].max():,.2f}")
+    print(f"   Price range: ${close.min():,.2f} - ${close.max():,.2f}")
     
     # Prove this is real market data, not mock
     print(f"\n🔍 REAL DATA VALIDATION:")
     
     # 1. Check OHLC relationships (real market data has these constraints)
-    valid_ohlc = (
-        (data['high'] >= data['low']).all() and
-        (data['high'] >= data['open']).all() and
-        (data['high'] >= data['close']).all() and
-        (data['low'] <= data['open']).all() and
-        (data['low'] <= data['close']).all()
-    )
+    o, h, l, c = data[['open', 'high', 'low', 'close']].to_numpy().T
+    valid_ohlc = bool(((h >= l) & (h >= o) & (h >= c) & (l <= o) & (l <= c)).all())
     print(f"   Valid OHLC relationships: {'✅ YES' if valid_ohlc else '❌ NO'}")
     
     # 2. Check for realistic price movements (not random walk)
-    returns = data['close'].pct_change().dropna()
-    volatility = returns.std()
-    autocorr = returns.autocorr() if len(returns) > 1 else 0
+    # Simple returns computed once; shared with prove_not_mock
+    returns = np.diff(close) / close[:-1]
+    volatility = returns.std(ddof=1)
+    autocorr = np.corrcoef(returns[:-1], returns[1:])[0, 1] if len(returns) > 2 else 0
     
     print(f"   Return volatility: {volatility:.4f} (realistic: 0.01-0.10)")
     print(f"   Return autocorrelation: {autocorr:.4f}")
     
     # 3. Check volume patterns (real exchanges have volume)
-    avg_volume = data['volume'].mean()
-    volume_cv = data['volume'].std() / avg_volume if avg_volume > 0 else 0
+    avg_volume = volume.mean()
+    volume_cv = volume.std(ddof=1) / avg_volume if avg_volume > 0 else 0
     
     print(f"   Average volume: {avg_volume:,.0f}")
     print(f"   Volume coefficient of variation: {volume_cv:.2f}")
@@ -60,18 +70,20 @@ def analyze_cached_data():
     # 4. Show actual price samples to prove it's real
     print(f"\n💰 SAMPLE REAL PRICES:")
     sample_size = min(5, len(data))
-    for i in range(sample_size):
-        row = data.iloc[i]
-        print(f"   {row['timestamp']}: ${row['close']:,.2f} (Vol: {row['volume']:,.0f})")
+    sample = data.head(sample_size)[['timestamp', 'close', 'volume']]
+    for ts, price, vol in sample.itertuples(index=False, name=None):
+        print(f"   {ts}: ${price:,.2f} (Vol: {vol:,.0f})")
     
     # 5. Check timestamp consistency (4h intervals)
     if len(data) > 1:
-        time_diffs = data['timestamp'].diff().dropna()
-        expected_diff = pd.Timedelta(hours=4)
+        # Raw int64 ticks in the column's own unit (ns or us, depending on the cache)
+        time_diffs = np.diff(data['timestamp'].array.asi8)
+        unit = data['timestamp'].dt.unit
+        expected_diff = np.timedelta64(4, 'h').astype(f'timedelta64[{unit}]').astype(np.int64)
         consistent_intervals = (time_diffs == expected_diff).mean()
         print(f"   4h interval consistency: {consistent_intervals:.1%}")
     
-    return data
+    return data, returns
 
 def test_full_pipeline_with_real_data(data):
     """Test the full pipeline with real market data"""
@@ -133,14 +145,12 @@ def test_full_pipeline_with_real_data(data):
     
     return True
 
-def prove_not_mock():
+def prove_not_mock(data, returns):
     """Prove this is real data, not mock"""
     
     print(f"\n🚫 PROOF: NOT MOCK DATA")
     print("=" * 30)
     
-    data = load_cached_data("BTC/USDT")
-    
     if data.empty:
         print("❌ No data to analyze")
         return
@@ -155,23 +165,24 @@ def prove_not_mock():
     print(f"\n   This data shows:")
     
     # Real market characteristics
-    returns = data['close'].pct_change().dropna()
     
     # 1. Volatility clustering (real markets have this)
-    vol_clustering = returns.rolling(10).std().std() / returns.std()
+    _, rolling_std = rolling_mean_std(returns, 10)
+    vol_clustering = rolling_std.std(ddof=1) / returns.std(ddof=1)
     print(f"   - Volatility clustering: {vol_clustering:.3f} (>0.1 = real market)")
     
     # 2. Price momentum patterns
-    momentum = returns.rolling(5).mean().std()
+    rolling_mean, _ = rolling_mean_std(returns, 5)
+    momentum = rolling_mean.std(ddof=1)
     print(f"   - Momentum patterns: {momentum:.6f}")
     
     # 3. Volume-price relationship
     if len(data) > 10:
-        vol_price_corr = data['volume'].corr(data['close'].pct_change().abs())
+        vol_price_corr = np.corrcoef(data['volume'].to_numpy()[1:], np.abs(returns))[0, 1]
         print(f"   - Volume-volatility correlation: {vol_price_corr:.3f}")
     
     # 4. Realistic price levels for BTC
-    avg_price = data['close'].mean()
+    avg_price = data['close'].to_numpy().mean()
     if 20000 <= avg_price <= 100000:
         print(f"   - Realistic BTC price levels: ${avg_price:,.0f} ✅")
     else:
@@ -186,14 +197,14 @@ def main():
     print("=" * 60)
     
     # Load and analyze cached real data
-    data = analyze_cached_data()
+    data, returns = analyze_cached_data()
     
     if data is None:
         print("❌ No real data available for testing")
         return
     
     # Prove it's not mock
-    prove_not_mock()
+    prove_not_mock(data, returns)
     
     # Test full pipeline
     success = test_full_pipeline_with_real_data(data)
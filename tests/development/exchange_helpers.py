@@ -0,0 +1,63 @@
+"""
+Shared ccxt client helpers and an offline fake exchange for the exchange test scripts
+"""
+
+import asyncio
+import ssl
+import aiohttp
+import certifi
+import ccxt
+import ccxt.async_support as ccxt_async
+
+class FakeExchange:
+    """Offline stand-in for a ccxt exchange serving `bars` (none by default); records each `since`"""
+    
+    def __init__(self, bars=(), exchange_id='fake'):
+        self.id = exchange_id
+        self.bars = [list(bar) for bar in bars]
+        self.calls = []
+    
+    def fetch_ohlcv(self, symbol=None, timeframe=None, since=None, limit=None, **kwargs):
+        self.calls.append(since)
+        rows = [bar for bar in self.bars if since is None or bar[0] >= since]
+        return rows[:limit] if limit else rows
+
+# Shared client settings for every exchange these tests build
+EXCHANGE_DEFAULTS = {'enableRateLimit': True, 'timeout': 15000}
+
+def make_exchange(exchange_name, **overrides):
+    """Sync ccxt exchange with the shared defaults"""
+    return getattr(ccxt, exchange_name)({**EXCHANGE_DEFAULTS, **overrides})
+
+def make_async_exchange(exchange_name, **overrides):
+    """Async ccxt exchange on its own keep-alive aiohttp session (call inside a coroutine)"""
+    # ccxt attaches its certifi SSL context only to sessions it creates itself;
+    # a caller-owned session needs the same CA bundle and proxy env support
+    ssl_context = ssl.create_default_context(cafile=certifi.where())
+    connector = aiohttp.TCPConnector(limit=16, keepalive_timeout=60, ssl=ssl_context)
+    session = aiohttp.ClientSession(connector=connector, trust_env=True)
+    return getattr(ccxt_async, exchange_name)({**EXCHANGE_DEFAULTS, **overrides, 'session': session})
+
+async def close_exchange(exchange):
+    """Close an exchange from make_async_exchange; it does not own its session"""
+    session = exchange.session
+    await exchange.close()
+    if session is not None:
+        await session.close()
+
+async def probe_exchanges(probe, exchanges_to_test):
+    """Run probe(name, symbol) for every exchange concurrently; wall time is the slowest probe"""
+    return await asyncio.gather(
+        *[probe(name, symbol) for name, symbol in exchanges_to_test],
+        return_exceptions=True,
+    )
+
+def short_error(e, limit=100):
+    """Exception message cut to `limit` chars; a string args[0] avoids formatting str(e)"""
+    msg = getattr(e, 'message', None)
+    if not isinstance(msg, str) or not msg:
+        msg = e.args[0] if e.args else None
+    if not isinstance(msg, str) or not msg:
+        # e.g. OSError(errno, strerror) or a bare TimeoutError()
+        msg = getattr(e, 'strerror', None) or str(e) or type(e).__name__
+    return msg[:limit]
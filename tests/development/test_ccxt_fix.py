@@ -35,7 +35,7 @@ def test_ccxt_exchanges():
             # Fetch real data
             ohlcv = exchange.fetch_ohlcv(symbol, "4h", limit=5)
             
-            if ohlcv and len(ohlcv) > 0:
+            if ohlcv:
                 print(f"   ✅ {exchange_name}: SUCCESS - Got {len(ohlcv)} bars")
                 
                 # Show sample data
@@ -7,6 +7,7 @@ Validates all pipeline components and requirements compliance.
 import sys
 import os
 import json
+import time
 from pathlib import Path
 
 # Add research directory to path
@@ -172,6 +173,130 @@ def test_pipeline_execution():
         except Exception as e:
             tests.append(("Data caching", False, f"❌ {e}"))
         
+        # Step 1a: Offline cache paths against a fake exchange in a temp directory
+        import tempfile
+        import pyarrow.parquet as pq
+        import fetch_raw
+        from fetch_raw import append_to_parquet, fetch_symbol_data_incremental, fetch_symbol_data_cached
+        from exchange_helpers import FakeExchange
+        
+        bar_ms = 4 * 60 * 60 * 1000
+        start_ms = int(pd.Timestamp('2024-01-01', tz='UTC').timestamp() * 1000)
+        
+        def fake_bars(first, count, close=100.0):
+            return [[start_ms + i * bar_ms, 1.0, 2.0, 0.5, close + i, 10.0] for i in range(first, first + count)]
+        
+        def bars_frame(first, count, close=100.0):
+            bars = np.asarray(fake_bars(first, count, close))
+            return pd.DataFrame({
+                'timestamp': pd.to_datetime(bars[:, 0].astype(np.int64), unit='ms', utc=True),
+                'open': bars[:, 1], 'high': bars[:, 2], 'low': bars[:, 3],
+                'close': bars[:, 4], 'volume': bars[:, 5],
+            })
+        
+        try:
+            with tempfile.TemporaryDirectory() as cache_dir:
+                path = os.path.join(cache_dir, 'FAKE_USDT.parquet')
+                cache_to_parquet(bars_frame(0, 10), 'FAKE/USDT', cache_dir)
+                
+                # Overlap with the cached tail: cached bars win, newer ones join the small last row group
+                added = append_to_parquet(bars_frame(8, 7, close=-1000.0), 'FAKE/USDT', cache_dir)
+                cached = load_cached_data('FAKE/USDT', cache_dir)
+                assert added == 5 and len(cached) == 15
+                assert cached['timestamp'].is_unique and cached['timestamp'].is_monotonic_increasing
+                assert (cached['close'].iloc[8:10] > 0).all() and (cached['close'].iloc[10:] < 0).all()
+                assert pq.ParquetFile(path).num_row_groups == 1
+                
+                # A full last row group is kept as is; the new rows start the next one
+                row_group_rows = fetch_raw.ROW_GROUP_ROWS
+                fetch_raw.ROW_GROUP_ROWS = 10
+                try:
+                    assert append_to_parquet(bars_frame(15, 2), 'FAKE/USDT', cache_dir) == 2
+                    assert append_to_parquet(bars_frame(17, 1), 'FAKE/USDT', cache_dir) == 1
+                finally:
+                    fetch_raw.ROW_GROUP_ROWS = row_group_rows
+                layout = pq.ParquetFile(path).metadata
+                assert [layout.row_group(i).num_rows for i in range(layout.num_row_groups)] == [15, 3]
+                cached = load_cached_data('FAKE/USDT', cache_dir)
+                assert len(cached) == 18 and cached['timestamp'].is_monotonic_increasing
+                
+                # Nothing new: no write at all
+                assert append_to_parquet(bars_frame(0, 15), 'FAKE/USDT', cache_dir) == 0
+                
+                # Bars older than the cached tail fall back to a sorted rewrite
+                added = append_to_parquet(bars_frame(-3, 3), 'FAKE/USDT', cache_dir)
+                cached = load_cached_data('FAKE/USDT', cache_dir)
+                assert added == 3 and len(cached) == 21
+                assert cached['timestamp'].is_monotonic_increasing
+                assert pq.ParquetFile(path).num_row_groups == 1
+            tests.append(("Parquet append", True, "✅"))
+        except Exception as e:
+            tests.append(("Parquet append", False, f"❌ {e}"))
+        
+        try:
+            with tempfile.TemporaryDirectory() as cache_dir:
+                exchange = FakeExchange(fake_bars(0, 20))
+                
+                # No cache yet: plain fetch, last (possibly open) bar dropped
+                first = fetch_symbol_data_incremental('FAKE/USDT', cache_dir=cache_dir, exchange=exchange)
+                assert exchange.calls == [None] and len(first) == 19
+                
+                # Resume at the last cached bar + one timeframe
+                exchange.bars += fake_bars(20, 5)
+                second = fetch_symbol_data_incremental('FAKE/USDT', cache_dir=cache_dir, exchange=exchange)
+                assert exchange.calls[-1] == start_ms + 19 * bar_ms
+                assert len(second) == 24 and second['timestamp'].is_unique
+                pd.testing.assert_frame_equal(second.iloc[:19], first)
+            
+            with tempfile.TemporaryDirectory() as cache_dir:
+                # Right after a close the resume fetch returns only the new, still-open bar
+                open_ms = int(time.time() * 1000) // bar_ms * bar_ms
+                closed = [[open_ms + i * bar_ms, 1.0, 2.0, 0.5, 100.0, 10.0] for i in range(-4, 0)]
+                cached_before = fetch_symbol_data_incremental(
+                    'FAKE/USDT', cache_dir=cache_dir, exchange=FakeExchange(closed + [[open_ms, 1.0, 2.0, 0.5, 109.0, 10.0]])
+                )
+                exchange = FakeExchange([[open_ms, 1.0, 2.0, 0.5, 109.0, 10.0]])
+                after = fetch_symbol_data_incremental('FAKE/USDT', cache_dir=cache_dir, exchange=exchange)
+                assert exchange.calls == [open_ms] and len(cached_before) == 4
+                pd.testing.assert_frame_equal(after, cached_before)
+            tests.append(("Incremental fetch", True, "✅"))
+        except Exception as e:
+            tests.append(("Incremental fetch", False, f"❌ {e}"))
+        
+        try:
+            with tempfile.TemporaryDirectory() as cache_dir:
+                exchange = FakeExchange(fake_bars(0, 10))
+                fetch_raw._FETCH_MEMO.clear()
+                
+                fetched = fetch_symbol_data_cached('FAKE/USDT', exchange=exchange, cache_dir=cache_dir)
+                assert len(exchange.calls) == 1 and len(fetched) == 9
+                
+                # In-process memo, then the parquet file, both inside the TTL
+                fetched.loc[0, 'close'] = -1.0  # callers get copies
+                memo_hit = fetch_symbol_data_cached('FAKE/USDT', exchange=exchange, cache_dir=cache_dir)
+                fetch_raw._FETCH_MEMO.clear()
+                disk_hit = fetch_symbol_data_cached('FAKE/USDT', exchange=exchange, cache_dir=cache_dir)
+                assert len(exchange.calls) == 1
+                assert memo_hit['close'].iloc[0] > 0
+                pd.testing.assert_frame_equal(memo_hit, disk_hit)
+                
+                # Another venue gets its own entry
+                other = FakeExchange(fake_bars(0, 10, close=500.0), exchange_id='other')
+                assert fetch_symbol_data_cached('FAKE/USDT', exchange=other, cache_dir=cache_dir)['close'].iloc[0] == 500.0
+                
+                # Past one candle duration the entry is stale and refetched
+                fetch_raw._FETCH_MEMO.clear()
+                stale = time.time() - 5 * 60 * 60
+                for fname in os.listdir(cache_dir):
+                    os.utime(os.path.join(cache_dir, fname), (stale, stale))
+                fetch_symbol_data_cached('FAKE/USDT', exchange=exchange, cache_dir=cache_dir)
+                assert len(exchange.calls) == 2
+            tests.append(("Fetch cache TTL", True, "✅"))
+        except Exception as e:
+            tests.append(("Fetch cache TTL", False, f"❌ {e}"))
+        finally:
+            fetch_raw._FETCH_MEMO.clear()
+        
         # Step 2: Build features (build_features.py)
         try:
             features = build_feature_set(synthetic_data, include_labels=True)
@@ -183,6 +308,59 @@ def test_pipeline_execution():
         except Exception as e:
             tests.append(("Feature engineering", False, f"❌ {e}"))
         
+        # Step 2a: The single-pass kernel must agree with the per-feature helpers
+        try:
+            from build_features import (
+                calculate_returns, calculate_ema, calculate_price_ema_ratios,
+                calculate_realized_volatility, calculate_log_volume, calculate_adv_30,
+                shift_features_for_causality, create_future_ret_label,
+            )
+            close, volume = synthetic_data['close'], synthetic_data['volume']
+            ret_df = calculate_returns(close, [1, 3, 6, 12])
+            ema_df = calculate_ema(close, [12, 24, 48])
+            by_helpers = shift_features_for_causality(pd.concat([
+                ret_df,
+                ema_df,
+                calculate_price_ema_ratios(close, ema_df, [12, 24, 48]),
+                calculate_realized_volatility(ret_df['ret_1'], [24, 72]),
+                calculate_log_volume(volume).to_frame('log_volume'),
+                calculate_adv_30(volume).to_frame('adv_30'),
+            ], axis=1))
+            by_helpers['future_ret'] = create_future_ret_label(close)
+            by_kernel = build_feature_set(synthetic_data, include_labels=True, drop_warmup=False)
+            pd.testing.assert_frame_equal(by_kernel, by_helpers)
+            tests.append(("Kernel matches helpers", True, "✅"))
+        except Exception as e:
+            tests.append(("Kernel matches helpers", False, f"❌ {e}"))
+        
+        # Step 2b: A missing close must not blank every later EMA
+        try:
+            gapped = synthetic_data.copy()
+            gapped.loc[100, 'close'] = np.nan
+            gap_features = build_feature_set(gapped, include_labels=False, drop_warmup=False)
+            close = gapped['close']
+            for w in [12, 24, 48]:
+                ema = close.ewm(span=w, adjust=False).mean()
+                pd.testing.assert_series_equal(
+                    gap_features[f'ema_{w}'], ema.shift(1), check_names=False
+                )
+                pd.testing.assert_series_equal(
+                    gap_features[f'close_ema_{w}_ratio'], (close / ema - 1).shift(1), check_names=False
+                )
+            tests.append(("EMA across NaN gap", True, "✅"))
+        except Exception as e:
+            tests.append(("EMA across NaN gap", False, f"❌ {e}"))
+        
+        # Step 2c: Fewer bars than the ADV window give all NaN, like rolling(30)
+        try:
+            from build_features import calculate_adv_30
+            for rows in (5, 29, 30, 40):
+                volume = synthetic_data['volume'].iloc[:rows]
+                pd.testing.assert_series_equal(calculate_adv_30(volume), volume.rolling(30).mean())
+            tests.append(("ADV on short input", True, "✅"))
+        except Exception as e:
+            tests.append(("ADV on short input", False, f"❌ {e}"))
+        
         # Step 3: Train model (train_model.py)
         try:
             X, y = prepare_training_data(features)
@@ -195,10 +373,36 @@ def test_pipeline_execution():
             predictions = model.predict(X[:10])
             assert len(predictions) == 10
             
+            # Parallel per-symbol runs cap LightGBM's threads per worker
+            assert train_lightgbm_model(X, y, n_jobs=1).n_jobs == 1
+            
             tests.append(("Model training", True, "✅"))
         except Exception as e:
             tests.append(("Model training", False, f"❌ {e}"))
         
+        # Step 3a: Per-symbol parallel pipeline, offline against the same bars
+        try:
+            from pipeline_parallel import run_pipeline_parallel, run_symbol_pipeline
+            bars = np.column_stack([
+                pd.DatetimeIndex(dates).asi8 // 10**6,
+                synthetic_data[['open', 'high', 'low', 'close', 'volume']].to_numpy(),
+            ]).tolist()
+            exchange = FakeExchange(bars)
+            
+            # Duplicate symbols run once
+            models = run_pipeline_parallel(
+                ["AAA/USDT", "BBB/USDT", "AAA/USDT"], max_workers=2, exchange=exchange
+            )
+            assert list(models) == ["AAA/USDT", "BBB/USDT"]
+            
+            single = run_symbol_pipeline("AAA/USDT", n_jobs=1, exchange=exchange)
+            for model in models.values():
+                assert model is not None
+                np.testing.assert_allclose(model.predict(X[:10]), single.predict(X[:10]))
+            tests.append(("Parallel pipeline", True, "✅"))
+        except Exception as e:
+            tests.append(("Parallel pipeline", False, f"❌ {e}"))
+        
         # Step 4: Export artifacts
         try:
             metadata = {
@@ -211,6 +415,7 @@ def test_pipeline_execution():
             # Verify artifacts exist
             artifacts_dir = Path("artifacts")
             assert (artifacts_dir / "model.pkl").exists()
+            assert (artifacts_dir / "model.txt").exists()
             assert (artifacts_dir / "meta.json").exists()
             assert (artifacts_dir / "features.json").exists()
             
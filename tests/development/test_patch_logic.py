@@ -4,12 +4,29 @@ Patch logic validation - tests the code changes independent of exchange connecti
 """
 
 import sys
+import functools
 import pandas as pd
 import inspect
 
+from exchange_helpers import FakeExchange
+
 sys.path.insert(0, 'research')
 from fetch_raw import fetch_symbol_data
 
+# Terms that must not appear in fetch_raw.py (matched case-insensitively)
+SCANNER_TERMS = ['scanner', 'last_closed', 'horizon', 'multi_symbol', 'live', 'inference']
+
+@functools.lru_cache(maxsize=1)
+def fetch_signature():
+    """Signature of fetch_symbol_data, introspected once per process"""
+    return inspect.signature(fetch_symbol_data)
+
+@functools.lru_cache(maxsize=1)
+def fetch_raw_source():
+    """Source text of research/fetch_raw.py, read once per process"""
+    with open('research/fetch_raw.py', 'r') as f:
+        return f.read()
+
 def analyze_patch_implementation():
     """Analyze the patch implementation for compliance"""
     
@@ -17,7 +34,7 @@ def analyze_patch_implementation():
     print("=" * 50)
     
     # Get function signature
-    sig = inspect.signature(fetch_symbol_data)
+    sig = fetch_signature()
     params = list(sig.parameters.keys())
     
     print(f"📋 Function signature analysis:")
@@ -51,7 +68,7 @@ def test_parameter_handling():
         print("   Test 1: Default behavior (since=None)...")
         try:
             # This should not raise an error, even if exchange fails
-            result = fetch_symbol_data("BTC/USDT", since=None)
+            result = fetch_symbol_data("BTC/USDT", since=None, exchange=FakeExchange())
             print("   ✅ Accepts since=None")
             default_behavior_ok = True
         except TypeError as e:
@@ -68,7 +85,7 @@ def test_parameter_handling():
         # Test 2: Function rejects invalid since type
         print("   Test 2: Invalid since type rejection...")
         try:
-            fetch_symbol_data("BTC/USDT", since="2024-01-01")
+            fetch_symbol_data("BTC/USDT", since="2024-01-01", exchange=FakeExchange())
             print("   ❌ Should reject string since parameter")
             type_validation_ok = False
         except TypeError as e:
@@ -86,7 +103,7 @@ def test_parameter_handling():
         print("   Test 3: Valid Timestamp acceptance...")
         try:
             valid_since = pd.Timestamp("2024-01-01", tz="UTC")
-            result = fetch_symbol_data("BTC/USDT", since=valid_since)
+            result = fetch_symbol_data("BTC/USDT", since=valid_since, exchange=FakeExchange())
             print("   ✅ Accepts valid Timestamp")
             timestamp_acceptance_ok = True
         except TypeError as e:
@@ -112,40 +129,34 @@ def analyze_code_changes():
     print(f"\n📝 CODE ANALYSIS")
     print("=" * 20)
     
-    # Read the source code
-    with open('research/fetch_raw.py', 'r') as f:
-        source_code = f.read()
+    source_code = fetch_raw_source()
+    
+    source_lower = source_code.lower()
     
     checks = []
     
     # Check 1: No scanner logic added
-    scanner_terms = ['scanner', 'last_closed', 'horizon', 'multi_symbol', 'live', 'inference']
-    scanner_found = any(term in source_code.lower() for term in scanner_terms)
+    scanner_found = any(term in source_lower for term in SCANNER_TERMS)
     checks.append(("No scanner logic", not scanner_found))
     
     # Check 2: Maintains closed candle guarantee
-    drop_last_found = "df.iloc[:-1]" in source_code
-    checks.append(("Last candle drop preserved", drop_last_found))
+    checks.append(("Last candle drop preserved", "df.iloc[:-1]" in source_code))
     
     # Check 3: UTC timestamp handling preserved
-    utc_found = "utc=True" in source_code
-    checks.append(("UTC timestamp handling", utc_found))
+    checks.append(("UTC timestamp handling", "utc=True" in source_code))
     
     # Check 4: Sorting preserved
-    sort_found = "sort_values" in source_code
-    checks.append(("Timestamp sorting", sort_found))
+    checks.append(("Timestamp sorting", "sort_values" in source_code))
     
     # Check 5: Since parameter implementation
     since_impl_found = "since" in source_code and "timestamp() * 1000" in source_code
     checks.append(("Since parameter implementation", since_impl_found))
     
     # Check 6: Type checking for since
-    type_check_found = "isinstance(since, pd.Timestamp)" in source_code
-    checks.append(("Since type validation", type_check_found))
+    checks.append(("Since type validation", "isinstance(since, pd.Timestamp)" in source_code))
     
     # Check 7: Import safety preserved
-    import_safety = '__name__ == "__main__"' in source_code
-    checks.append(("Import safety preserved", import_safety))
+    checks.append(("Import safety preserved", '__name__ == "__main__"' in source_code))
     
     # Check 8: No cache logic modified
     cache_functions = ['cache_to_parquet', 'load_cached_data']
@@ -21,19 +21,21 @@ def test_timestamp_conversion():
         pd.Timestamp("2023-12-31 23:59:59", tz="UTC"),
     ]
     
-    for i, ts in enumerate(test_cases, 1):
+    # Convert all cases to milliseconds in one pass (same epoch-ms value as
+    # int(ts.timestamp() * 1000) in fetch_raw.py), then back to UTC
+    idx = pd.DatetimeIndex(test_cases)
+    ms_timestamps = idx.as_unit('ms').asi8
+    back_to_ts = pd.to_datetime(ms_timestamps, unit='ms', utc=True)
+    matches = idx == back_to_ts
+    
+    for i, (ts, ms_timestamp, back, match) in enumerate(
+        zip(idx, ms_timestamps, back_to_ts, matches), 1
+    ):
         print(f"\n   Test {i}: {ts}")
-        
-        # Convert to milliseconds (same logic as in fetch_raw.py)
-        ms_timestamp = int(ts.timestamp() * 1000)
-        
-        # Convert back to verify
-        back_to_ts = pd.Timestamp(ms_timestamp, unit='ms', tz='UTC')
-        
         print(f"      Original: {ts}")
         print(f"      Milliseconds: {ms_timestamp}")
-        print(f"      Back to timestamp: {back_to_ts}")
-        print(f"      Round-trip match: {'✅ YES' if ts == back_to_ts else '❌ NO'}")
+        print(f"      Back to timestamp: {back}")
+        print(f"      Round-trip match: {'✅ YES' if match else '❌ NO'}")
     
     print(f"\n✅ Timestamp conversion logic verified")
 